@@ -3,6 +3,7 @@
 from .memory import MemoryManager, MemoryRecord
 from .persona import PaimonPersona
 from .command_docs import CommandDocumentation
+from .semantic_cache import SemanticCache
 from .chatbot import PaibotChat
 
 __all__ = [
@@ -10,5 +11,6 @@ __all__ = [
     "MemoryRecord",
     "PaimonPersona",
     "CommandDocumentation",
+    "SemanticCache",
     "PaibotChat",
 ]
@@ -2,18 +2,38 @@
 
 from __future__ import annotations
 
+import hashlib
+import json
 import os
 import re
-from typing import Iterable, List
+from collections import OrderedDict
+from itertools import islice
+from typing import Deque, Iterable, Iterator, List
 
 import google.generativeai as genai
 
 from .command_docs import CommandDocument, CommandDocumentation
 from .memory import MemoryManager, MemoryRecord
 from .persona import PaimonPersona
+from .semantic_cache import SemanticCache
 
 COMMAND_PATTERN = re.compile(r"(?:!|/)?(?:comando|command|cmd)[:\s]+(?P<name>[\w-]+)", re.IGNORECASE)
 
+EXACT_CACHE_SIZE = 1024
+
+_SYSTEM_INSTRUCTION = (
+    "Eres Paibot, un asistente del mod Paibot para Geometry Dash. "
+    "Siempre recuerda que eres un bot amistoso y habla en español. "
+    "Usa la memoria proporcionada para mantener el contexto y apóyate en la documentación "
+    ".md cuando el usuario pregunte por comandos específicos."
+)
+_GENERATION_CONFIG = genai.types.GenerationConfig(
+    temperature=0.75,
+    top_p=0.9,
+    top_k=40,
+    max_output_tokens=512,
+)
+
 
 class PaibotChat:
     """High-level chat interface wrapping Gemini with custom behaviour."""
@@ -28,26 +48,31 @@ class PaibotChat:
         model: genai.GenerativeModel | None = None,
         history_window: int = 12,
         mention_aliases: Iterable[str] | None = None,
+        semantic_cache: SemanticCache | None = None,
+        system_instruction: str | None = None,
+        generation_config: genai.types.GenerationConfig | None = None,
     ) -> None:
-        self.memory = memory_manager or MemoryManager()
+        self._history_window = max(history_window, 1)
+        self.memory = memory_manager or MemoryManager(max_records=self._history_window * 2)
+        if self.memory.max_records is None:
+            # Injected managers default to unbounded; apply the chat window
+            # so histories stay trimmed and files keep compacting.
+            self.memory.max_records = self._history_window * 2
         self.persona = persona or PaimonPersona()
         self.command_docs = command_docs or CommandDocumentation()
-        self._history_window = max(history_window, 1)
+        self._semantic_cache = semantic_cache
+        self._exact_cache: OrderedDict[str, str] = OrderedDict()
+        self._model_name = model_name
         self._mention_aliases = tuple(alias.lower() for alias in (mention_aliases or ("paibot", "@paibot", "paimon")))
-
-        self._system_instruction = (
-            "Eres Paibot, un asistente del mod Paibot para Geometry Dash. "
-            "Siempre recuerda que eres un bot amistoso y habla en español. "
-            "Usa la memoria proporcionada para mantener el contexto y apóyate en la documentación "
-            ".md cuando el usuario pregunte por comandos específicos."
-        )
-        self._generation_config = genai.types.GenerationConfig(
-            temperature=0.75,
-            top_p=0.9,
-            top_k=40,
-            max_output_tokens=512,
+        self._mention_pattern = (
+            re.compile("|".join(re.escape(alias) for alias in self._mention_aliases), re.IGNORECASE)
+            if self._mention_aliases
+            else None
         )
 
+        self._system_instruction = system_instruction or _SYSTEM_INSTRUCTION
+        self._generation_config = generation_config or _GENERATION_CONFIG
+
         if model is not None:
             self._model = model
         else:
@@ -75,22 +100,60 @@ class PaibotChat:
         if command_document:
             base_response = self._format_command_response(command_document)
         else:
-            base_response = self._generate_model_reply(history, message, mention)
+            base_response = self._generate_model_reply(user_id, history, message, mention)
 
         final_response = self.persona.stylize(base_response) if mention else base_response
 
-        updated_history = history + [
-            MemoryRecord(role="user", content=message),
-            MemoryRecord(role="assistant", content=final_response, metadata={"mention": str(mention).lower()}),
-        ]
-        trimmed_history = self._trim_history(updated_history)
-        self.memory.save_history(user_id, trimmed_history)
+        self.memory.append_many(
+            user_id,
+            (
+                MemoryRecord(role="user", content=message),
+                MemoryRecord(role="assistant", content=final_response, metadata={"mention": str(mention).lower()}),
+            ),
+        )
 
         return final_response
 
+    def respond_stream(self, user_id: str, message: str) -> Iterator[str]:
+        """Stream the response for the provided user message chunk by chunk.
+
+        The full response is persisted to memory only once streaming has
+        finished. Command and mention replies need the complete text before
+        they can be formatted, so those arrive as a single chunk.
+        """
+        message = message.strip()
+        if not message:
+            yield "Paimon no escuchó nada, ¡intenta decir algo de nuevo!"
+            return
+
+        history = self.memory.load_history(user_id)
+        mention = self._is_mention(message)
+        command_document = self._resolve_command_query(message)
+
+        if command_document or mention:
+            if command_document:
+                base_response = self._format_command_response(command_document)
+            else:
+                base_response = self._generate_model_reply(user_id, history, message, mention)
+            final_response = self.persona.stylize(base_response) if mention else base_response
+            yield final_response
+        else:
+            pieces: List[str] = []
+            for piece in self._stream_model_reply(user_id, history, message):
+                pieces.append(piece)
+                yield piece
+            final_response = "".join(pieces).strip()
+
+        self.memory.append_many(
+            user_id,
+            (
+                MemoryRecord(role="user", content=message),
+                MemoryRecord(role="assistant", content=final_response, metadata={"mention": str(mention).lower()}),
+            ),
+        )
+
     def _is_mention(self, message: str) -> bool:
-        normalized = message.lower()
-        return any(alias in normalized for alias in self._mention_aliases)
+        return bool(self._mention_pattern and self._mention_pattern.search(message))
 
     def _resolve_command_query(self, message: str) -> CommandDocument | None:
         match = COMMAND_PATTERN.search(message)
@@ -101,11 +164,8 @@ class PaibotChat:
                 return document
             return self.command_docs.find_best_match(candidate)
 
-        normalized = message.lower()
-        for name in self.command_docs.available_commands():
-            if name in normalized:
-                return self.command_docs.get(name)
-        return None
+        hit = self.command_docs.scan(message)
+        return self.command_docs.get(hit) if hit else None
 
     def _format_command_response(self, document: CommandDocument) -> str:
         summary = document.summary()
@@ -114,11 +174,95 @@ class PaibotChat:
             f"Puedes revisar el archivo `{document.path.as_posix()}` para más ejemplos detallados."
         )
 
-    def _generate_model_reply(self, history: List[MemoryRecord], message: str, mention: bool) -> str:
-        contents: List[dict[str, object]] = []
-        for record in self._recent_history(history):
-            role = "user" if record.role == "user" else "model"
-            contents.append({"role": role, "parts": [record.content]})
+    def _generate_model_reply(self, user_id: str, history: Deque[MemoryRecord], message: str, mention: bool) -> str:
+        recent = self._recent_history(history)
+
+        exact_key = self._exact_key(recent, message)
+        cached = self._exact_cache.get(exact_key)
+        if cached is not None:
+            self._exact_cache.move_to_end(exact_key)
+            return cached
+
+        if self._semantic_cache is not None:
+            cache_key = "\n".join(record.content for record in recent) + "\n" + message
+            cached = self._semantic_cache.lookup(user_id, cache_key)
+            if cached is not None:
+                return cached
+
+        contents = self._build_contents(user_id, history, message, mention)
+
+        response = self._model.generate_content(
+            contents,
+            generation_config=self._generation_config,
+        )
+        text = getattr(response, "text", "")
+        reply = text.strip()
+        if not reply:
+            # Never cache the placeholder: a transient empty generation
+            # would otherwise be replayed when the user retries.
+            return "Paimon todavía está pensando en la respuesta."
+
+        self._exact_cache[exact_key] = reply
+        if len(self._exact_cache) > EXACT_CACHE_SIZE:
+            self._exact_cache.popitem(last=False)
+
+        if self._semantic_cache is not None:
+            self._semantic_cache.store(user_id, cache_key, reply)
+        return reply
+
+    def _stream_model_reply(self, user_id: str, history: Deque[MemoryRecord], message: str) -> Iterator[str]:
+        """Yield the model reply chunk by chunk, consulting the caches first."""
+        recent = self._recent_history(history)
+
+        exact_key = self._exact_key(recent, message)
+        cached = self._exact_cache.get(exact_key)
+        if cached is not None:
+            self._exact_cache.move_to_end(exact_key)
+            yield cached
+            return
+
+        cache_key = ""
+        if self._semantic_cache is not None:
+            cache_key = "\n".join(record.content for record in recent) + "\n" + message
+            cached = self._semantic_cache.lookup(user_id, cache_key)
+            if cached is not None:
+                yield cached
+                return
+
+        response = self._model.generate_content(
+            self._build_contents(user_id, history, message, mention=False),
+            generation_config=self._generation_config,
+            stream=True,
+        )
+        pieces: List[str] = []
+        for chunk in response:
+            text = getattr(chunk, "text", "")
+            if text:
+                pieces.append(text)
+                yield text
+
+        reply = "".join(pieces).strip()
+        if not reply:
+            # Never cache the placeholder: a transient empty generation
+            # would otherwise be replayed when the user retries.
+            yield "Paimon todavía está pensando en la respuesta."
+            return
+
+        self._exact_cache[exact_key] = reply
+        if len(self._exact_cache) > EXACT_CACHE_SIZE:
+            self._exact_cache.popitem(last=False)
+
+        if self._semantic_cache is not None:
+            self._semantic_cache.store(user_id, cache_key, reply)
+
+    def _build_contents(
+        self, user_id: str, history: Deque[MemoryRecord], message: str, mention: bool
+    ) -> List[dict[str, object]]:
+        cached = self.memory.load_contents(user_id, history)
+        if len(cached) > self._history_window:
+            contents = list(islice(cached, len(cached) - self._history_window, None))
+        else:
+            contents = list(cached)
 
         if mention:
             contents.append(
@@ -132,24 +276,21 @@ class PaibotChat:
             )
 
         contents.append({"role": "user", "parts": [message]})
+        return contents
 
-        response = self._model.generate_content(
-            contents,
-            generation_config=self._generation_config,
-        )
-        text = getattr(response, "text", "")
-        return text.strip() or "Paimon todavía está pensando en la respuesta."
+    def _exact_key(self, recent: List[MemoryRecord], message: str) -> str:
+        payload = {
+            "m": self._model_name,
+            "msgs": [(record.role, record.content) for record in recent],
+            "q": message,
+        }
+        digest = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        return hashlib.sha256(digest).hexdigest()
 
-    def _recent_history(self, history: List[MemoryRecord]) -> List[MemoryRecord]:
+    def _recent_history(self, history: Deque[MemoryRecord]) -> List[MemoryRecord]:
         if len(history) <= self._history_window:
-            return history
-        return history[-self._history_window :]
-
-    def _trim_history(self, history: List[MemoryRecord]) -> List[MemoryRecord]:
-        max_records = self._history_window * 2
-        if len(history) <= max_records:
-            return history
-        return history[-max_records:]
+            return list(history)
+        return list(islice(history, len(history) - self._history_window, None))
 
 
 __all__ = ["PaibotChat"]
@@ -2,9 +2,15 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+import difflib
+import os
+import pickle
+import re
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Iterable
+from typing import Dict, Iterable, Tuple
+
+CACHE_FILENAME = ".cache.pkl"
 
 
 @dataclass(slots=True)
@@ -12,11 +18,14 @@ class CommandDocument:
     name: str
     content: str
     path: Path
+    _summary: str | None = field(default=None, init=False, repr=False)
 
     def summary(self) -> str:
         """Return a concise summary (first paragraph) of the document."""
-        sections = [section.strip() for section in self.content.split('\n\n') if section.strip()]
-        return sections[0] if sections else self.content.strip()
+        if self._summary is None:
+            sections = [section.strip() for section in self.content.split('\n\n') if section.strip()]
+            self._summary = sections[0] if sections else self.content.strip()
+        return self._summary
 
 
 class CommandDocumentation:
@@ -24,35 +33,115 @@ class CommandDocumentation:
 
     def __init__(self, docs_directory: Path | None = None) -> None:
         self._docs_directory = docs_directory or Path("commands")
+        self._paths: Dict[str, Path] = {}
         self._documents: Dict[str, CommandDocument] = {}
-        self._load_documents()
+        self._scan_pattern: re.Pattern[str] | None = None
+        # Warm-start artifact: {name: (content, source mtime)} so restarts
+        # skip re-reading markdown that has not changed on disk.
+        self._cache: Dict[str, Tuple[str, float]] = {}
+        self._discover_documents()
+        self._load_cache()
 
-    def _load_documents(self) -> None:
+    def _discover_documents(self) -> None:
+        """Enumerate available documents without reading their contents."""
         if not self._docs_directory.exists():
             return
-        for md_file in self._docs_directory.glob("*.md"):
-            content = md_file.read_text(encoding="utf-8")
-            key = md_file.stem.lower()
-            self._documents[key] = CommandDocument(name=key, content=content, path=md_file)
+        self._paths = {md_file.stem.lower(): md_file for md_file in self._docs_directory.glob("*.md")}
+        self._build_scan_pattern()
+
+    @property
+    def _cache_file(self) -> Path:
+        return self._docs_directory / CACHE_FILENAME
+
+    def _load_cache(self) -> None:
+        # pickle.load on a corrupt file can raise almost anything
+        # (ValueError, AttributeError, ImportError, ...); the cache is an
+        # optimization, so any unreadable artifact is simply ignored.
+        try:
+            with self._cache_file.open("rb") as fp:
+                cached = pickle.load(fp)
+        except Exception:
+            return
+        if isinstance(cached, dict):
+            self._cache = cached
+
+    def _save_cache(self) -> None:
+        # Write-then-rename so a crash mid-dump never leaves a truncated
+        # pickle behind for the next start to choke on.
+        tmp_path = self._cache_file.with_suffix(".pkl.tmp")
+        try:
+            with tmp_path.open("wb") as fp:
+                pickle.dump(self._cache, fp)
+            os.replace(tmp_path, self._cache_file)
+        except OSError:
+            pass  # The cache is an optimization; never fail doc access over it.
+
+    def _materialize(self, name: str) -> CommandDocument | None:
+        document = self._documents.get(name)
+        if document is not None:
+            return document
+        path = self._paths.get(name)
+        if path is None:
+            return None
+
+        mtime = path.stat().st_mtime
+        cached = self._cache.get(name)
+        if cached is not None and cached[1] == mtime:
+            content = cached[0]
+        else:
+            content = path.read_text(encoding="utf-8")
+            self._cache[name] = (content, mtime)
+            self._save_cache()
+
+        document = CommandDocument(name=name, content=content, path=path)
+        self._documents[name] = document
+        return document
+
+    def _build_scan_pattern(self) -> None:
+        if not self._paths:
+            self._scan_pattern = None
+            return
+        # Longest names first so overlapping commands resolve to the most
+        # specific one in a single pass.
+        names = sorted(self._paths, key=len, reverse=True)
+        self._scan_pattern = re.compile("|".join(re.escape(name) for name in names))
 
     def refresh(self) -> None:
-        """Reload documents from disk."""
+        """Reload documents from disk, discarding the warm-start cache."""
+        self._paths.clear()
         self._documents.clear()
-        self._load_documents()
+        self._cache.clear()
+        self._scan_pattern = None
+        try:
+            self._cache_file.unlink()
+        except OSError:
+            pass
+        self._discover_documents()
+
+    def scan(self, text: str) -> str | None:
+        """Return the first documented command name mentioned in ``text``."""
+        if self._scan_pattern is None:
+            return None
+        match = self._scan_pattern.search(text.lower())
+        return match.group(0) if match else None
 
     def available_commands(self) -> Iterable[str]:
-        return self._documents.keys()
+        return self._paths.keys()
 
     def get(self, command_name: str) -> CommandDocument | None:
-        return self._documents.get(command_name.lower())
+        return self._materialize(command_name.lower())
 
     def find_best_match(self, query: str) -> CommandDocument | None:
         normalized = query.lower()
-        if normalized in self._documents:
-            return self._documents[normalized]
-        for name, document in self._documents.items():
+        if normalized in self._paths:
+            return self._materialize(normalized)
+        for name in self._paths:
             if name in normalized or normalized in name:
-                return document
+                return self._materialize(name)
+        # Typo tolerance: resolve e.g. "optimzer" -> "optimizer".
+        close = difflib.get_close_matches(normalized, self._paths, n=1, cutoff=0.75)
+        if close:
+            return self._materialize(close[0])
         return None
 
 
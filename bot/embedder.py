@@ -0,0 +1,75 @@
+"""Local sentence embeddings via ONNX Runtime.
+
+Optional module: requires ``onnxruntime``, ``tokenizers`` and ``numpy``,
+which are only needed when the semantic cache is enabled. An int8-quantized
+export of ``all-MiniLM-L6-v2`` keeps embedding latency and memory low enough
+to sit on the chat hot path without a GPU.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List, Sequence
+
+import numpy as np
+import onnxruntime
+from tokenizers import Tokenizer
+
+DEFAULT_MODEL_PATH = Path("models") / "all-MiniLM-L6-v2-int8.onnx"
+DEFAULT_TOKENIZER_PATH = Path("models") / "all-MiniLM-L6-v2-tokenizer.json"
+
+
+class OnnxEmbedder:
+    """Embeds text with a quantized sentence encoder running on CPU."""
+
+    def __init__(
+        self,
+        model_path: Path = DEFAULT_MODEL_PATH,
+        tokenizer_path: Path = DEFAULT_TOKENIZER_PATH,
+        *,
+        max_length: int = 256,
+        intra_op_num_threads: int | None = None,
+    ) -> None:
+        options = onnxruntime.SessionOptions()
+        if intra_op_num_threads is not None:
+            options.intra_op_num_threads = intra_op_num_threads
+        self._session = onnxruntime.InferenceSession(
+            str(model_path),
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+        self._tokenizer = Tokenizer.from_file(str(tokenizer_path))
+        self._tokenizer.enable_truncation(max_length=max_length)
+        self._tokenizer.enable_padding()
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Return one L2-normalized float32 embedding per input text."""
+        encodings = self._tokenizer.encode_batch(texts)
+        input_ids = np.array([enc.ids for enc in encodings], dtype=np.int64)
+        attention_mask = np.array([enc.attention_mask for enc in encodings], dtype=np.int64)
+
+        (hidden_states,) = self._session.run(
+            None,
+            {
+                "input_ids": input_ids,
+                "attention_mask": attention_mask,
+                "token_type_ids": np.zeros_like(input_ids),
+            },
+        )
+
+        # Mean-pool over non-padding tokens, then L2-normalize so cosine
+        # similarity reduces to a dot product.
+        mask = attention_mask[:, :, np.newaxis].astype(np.float32)
+        summed = (hidden_states * mask).sum(axis=1)
+        counts = np.clip(mask.sum(axis=1), 1.0, None)
+        pooled = summed / counts
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        np.clip(norms, 1e-12, None, out=norms)
+        return (pooled / norms).astype(np.float32)
+
+    def __call__(self, text: str) -> Sequence[float]:
+        """Embed a single text; matches the SemanticCache embedder contract."""
+        return self.embed([text])[0]
+
+
+__all__ = ["OnnxEmbedder"]
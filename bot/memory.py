@@ -5,15 +5,37 @@ from __future__ import annotations
 import json
 import os
 import re
-from dataclasses import asdict, dataclass, field
+from collections import deque
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Iterable, List
+from typing import Deque, Iterable
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional accelerator
+    orjson = None
+
+if orjson is not None:
+    def _json_dumps(obj: object) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+
+    _json_loads = orjson.loads
+else:
+    def _json_dumps(obj: object) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+
+    _json_loads = json.loads
 
 ISO_TIMESTAMP = "%Y-%m-%dT%H:%M:%S.%fZ"
 
+_SANITIZE_RE = re.compile(r"[^a-zA-Z0-9_.-]")
 
-@dataclass
+#: Appends between in-place compactions of a user's JSONL file.
+COMPACT_EVERY = 256
+
+
+@dataclass(slots=True)
 class MemoryRecord:
     """Represents a single conversational memory record."""
 
@@ -26,17 +48,21 @@ class MemoryRecord:
 
     def to_json(self) -> dict[str, object]:
         """Serialize the record to a JSON-compatible dict."""
-        payload = asdict(self)
+        payload: dict[str, object] = {
+            "role": self.role,
+            "content": self.content,
+            "timestamp": self.timestamp,
+        }
         # Drop None metadata to keep files compact
-        if payload.get("metadata") is None:
-            payload.pop("metadata")
+        if self.metadata is not None:
+            payload["metadata"] = self.metadata
         return payload
 
 
 class MemoryManager:
     """Stores conversational history per user scoped by repository metadata."""
 
-    def __init__(self, base_directory: Path | None = None) -> None:
+    def __init__(self, base_directory: Path | None = None, max_records: int | None = None) -> None:
         repo_owner = os.environ.get("GITHUB_REPO_OWNER", "unknown-owner").strip() or "unknown-owner"
         repo_name = os.environ.get("GITHUB_REPO_NAME", "unknown-repo").strip() or "unknown-repo"
         branch = os.environ.get("GITHUB_BRANCH", "unknown-branch").strip() or "unknown-branch"
@@ -46,61 +72,150 @@ class MemoryManager:
 
         self._base_directory = base_directory
         self._base_directory.mkdir(parents=True, exist_ok=True)
+        self._max_records = max_records
+        self._appends_since_compaction: dict[str, int] = {}
+        # Lazily built Gemini-format ({"role", "parts"}) view of each user's
+        # history, kept in sync by append_many so chat turns do not re-map
+        # the whole window on every call.
+        self._contents_cache: dict[str, Deque[dict[str, object]]] = {}
 
     @property
     def base_directory(self) -> Path:
         """Return the directory root where memories are stored."""
         return self._base_directory
 
+    @property
+    def max_records(self) -> int | None:
+        """Bound applied to loaded histories; ``None`` keeps them unbounded."""
+        return self._max_records
+
+    @max_records.setter
+    def max_records(self, value: int | None) -> None:
+        self._max_records = value
+        # Cached content views were built with the old bound.
+        self._contents_cache.clear()
+
     def _sanitize_user_id(self, user_id: str) -> str:
-        sanitized = re.sub(r"[^a-zA-Z0-9_.-]", "_", user_id)
+        sanitized = _SANITIZE_RE.sub("_", user_id)
         return sanitized or "anonymous"
 
     def _memory_file(self, user_id: str) -> Path:
+        filename = f"{self._sanitize_user_id(user_id)}.jsonl"
+        return self._base_directory / filename
+
+    def _legacy_memory_file(self, user_id: str) -> Path:
         filename = f"{self._sanitize_user_id(user_id)}.json"
         return self._base_directory / filename
 
-    def load_history(self, user_id: str) -> List[MemoryRecord]:
-        """Load the stored history for a user."""
+    @staticmethod
+    def _record_to_content(record: MemoryRecord) -> dict[str, object]:
+        role = "user" if record.role == "user" else "model"
+        return {"role": role, "parts": [record.content]}
+
+    @staticmethod
+    def _record_from_payload(item: dict[str, object]) -> MemoryRecord:
+        return MemoryRecord(
+            role=item.get("role", "assistant"),
+            content=item.get("content", ""),
+            metadata=item.get("metadata"),
+            timestamp=item.get("timestamp", datetime.now(timezone.utc).strftime(ISO_TIMESTAMP)),
+        )
+
+    def load_history(self, user_id: str) -> Deque[MemoryRecord]:
+        """Load the stored history for a user as a bounded deque."""
         path = self._memory_file(user_id)
         if not path.exists():
-            return []
+            return self._load_legacy_history(user_id)
 
+        history: Deque[MemoryRecord] = deque(maxlen=self._max_records)
         with path.open("r", encoding="utf-8") as fp:
-            payload = json.load(fp)
-
-        history: List[MemoryRecord] = []
-        for item in payload.get("history", []):
-            history.append(
-                MemoryRecord(
-                    role=item.get("role", "assistant"),
-                    content=item.get("content", ""),
-                    metadata=item.get("metadata"),
-                    timestamp=item.get("timestamp", datetime.now(timezone.utc).strftime(ISO_TIMESTAMP)),
-                )
-            )
+            for line in fp:
+                line = line.strip()
+                if line:
+                    history.append(self._record_from_payload(_json_loads(line)))
         return history
 
+    def _load_legacy_history(self, user_id: str) -> Deque[MemoryRecord]:
+        """Migrate the pre-JSONL single-document format, if present."""
+        path = self._legacy_memory_file(user_id)
+        if not path.exists():
+            return deque(maxlen=self._max_records)
+
+        payload = _json_loads(path.read_bytes())
+        history: Deque[MemoryRecord] = deque(
+            (self._record_from_payload(item) for item in payload.get("history", [])),
+            maxlen=self._max_records,
+        )
+        # Rewrite the records as JSONL immediately; otherwise the first
+        # append would create a .jsonl holding only the new records and
+        # orphan the legacy history.
+        self.save_history(user_id, history)
+        path.unlink()
+        return history
+
+    def load_contents(
+        self, user_id: str, history: Iterable[MemoryRecord] | None = None
+    ) -> Deque[dict[str, object]]:
+        """Return the Gemini-format view of a user's history, cached."""
+        contents = self._contents_cache.get(user_id)
+        if contents is None:
+            if history is None:
+                history = self.load_history(user_id)
+            contents = deque(
+                (self._record_to_content(record) for record in history),
+                maxlen=self._max_records,
+            )
+            self._contents_cache[user_id] = contents
+        return contents
+
     def save_history(self, user_id: str, history: Iterable[MemoryRecord]) -> None:
-        """Persist the provided history for a user."""
-        records = list(history)
-        payload = {
-            "user_id": user_id,
-            "history": [record.to_json() for record in records],
-            "updated_at": datetime.now(timezone.utc).strftime(ISO_TIMESTAMP),
-        }
+        """Rewrite the full history for a user (used for compaction)."""
+        history = list(history)
+        self._contents_cache.pop(user_id, None)
+        lines = [_json_dumps(record.to_json()) for record in history]
+        data = ("\n".join(lines) + "\n").encode("utf-8") if lines else b""
+
+        # Write the whole payload in one go and swap it in atomically, so a
+        # crash mid-rewrite never leaves a truncated history behind.
         path = self._memory_file(user_id)
-        with path.open("w", encoding="utf-8") as fp:
-            json.dump(payload, fp, ensure_ascii=False, indent=2)
+        tmp_path = path.with_suffix(".jsonl.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+        self._appends_since_compaction[user_id] = 0
+
+    def append_record(self, user_id: str, record: MemoryRecord) -> None:
+        """Append a single record without rewriting the existing file."""
+        self.append_many(user_id, (record,))
+
+    def append_many(self, user_id: str, records: Iterable[MemoryRecord]) -> None:
+        """Append several records with a single file open."""
+        records = list(records)
+        lines = [_json_dumps(record.to_json()) for record in records]
+        if not lines:
+            return
+
+        contents = self._contents_cache.get(user_id)
+        if contents is not None:
+            contents.extend(self._record_to_content(record) for record in records)
+
+        path = self._memory_file(user_id)
+        with path.open("a", encoding="utf-8") as fp:
+            fp.write("\n".join(lines) + "\n")
+
+        count = self._appends_since_compaction.get(user_id, 0) + len(lines)
+        self._appends_since_compaction[user_id] = count
+        if self._max_records is not None and count >= COMPACT_EVERY:
+            self._compact(user_id)
+
+    def _compact(self, user_id: str) -> None:
+        # load_history already bounds the deque to max_records, so a
+        # round-trip through save_history trims the file.
+        self.save_history(user_id, self.load_history(user_id))
 
     def append(self, user_id: str, record: MemoryRecord) -> None:
         """Append a single record to the user's history."""
-        history = self.load_history(user_id)
-        history.append(record)
-        self.save_history(user_id, history)
+        self.append_record(user_id, record)
 
     def extend(self, user_id: str, records: Iterable[MemoryRecord]) -> None:
         """Append multiple records to the user's history."""
-        history = self.load_history(user_id)
-        history.extend(records)
-        self.save_history(user_id, history)
+        self.append_many(user_id, records)
@@ -2,9 +2,16 @@
 
 from __future__ import annotations
 
+import re
 from dataclasses import dataclass
 from typing import Iterable
 
+# Sentence segments between terminators; matches never start or end with
+# whitespace, so callers can skip re-stripping them. A trailing ! or ? is
+# kept with its sentence (periods are dropped, as the decorator replaces
+# them) so later decoration decisions can respect it.
+_SENTENCE_RE = re.compile(r"[^\s.!?][^.!?\n]*(?:[^\s.!?\n]|[!?])|[^\s.!?][!?]?")
+
 
 @dataclass(slots=True)
 class PaimonPersona:
@@ -15,7 +22,6 @@ class PaimonPersona:
     closing_emotes: tuple[str, ...] = ("☆", "✨", "♪", "☄️")
 
     def _decorate_sentence(self, sentence: str) -> str:
-        sentence = sentence.strip()
         if not sentence:
             return sentence
 
@@ -31,13 +37,17 @@ class PaimonPersona:
         return sentence
 
     def stylize(self, text: str, context_tags: Iterable[str] | None = None) -> str:
-        """Return a Paimon-styled response."""
-        text = text.strip()
+        """Return a Paimon-styled response.
+
+        ``text`` is expected to be already trimmed (as the chat pipeline
+        guarantees); the splitter never yields surrounding whitespace, so no
+        per-sentence stripping happens here either.
+        """
         if not text:
             return "¡Paimon está un poco confundida ahora mismo!"
 
-        sentences = [part.strip() for part in text.replace("\n", " ").split('.')]
-        decorated = [self._decorate_sentence(sentence) for sentence in sentences if sentence]
+        sentences = _SENTENCE_RE.findall(text)
+        decorated = [self._decorate_sentence(sentence) for sentence in sentences]
         if not decorated:
             decorated = ["¡Paimon no encuentra palabras para esto!"]
 
@@ -0,0 +1,150 @@
+"""Embedding-similarity cache for model responses."""
+
+from __future__ import annotations
+
+import math
+import time
+from typing import Callable, List, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional accelerator
+    np = None
+
+Embedder = Callable[[str], Sequence[float]]
+
+
+def _normalize(vector: Sequence[float]) -> List[float]:
+    norm = math.sqrt(sum(value * value for value in vector))
+    if norm == 0.0:
+        return list(vector)
+    return [value / norm for value in vector]
+
+
+class SemanticCache:
+    """Caches generated responses keyed by embedding similarity of the prompt.
+
+    Lookups embed the prompt locally and return the stored response whose
+    embedding has the highest cosine similarity, provided it clears the
+    configured threshold and has not expired. Entries are namespaced (per
+    user) so one user's conversation never answers another's.
+
+    Embeddings are stored row-wise in a preallocated float32 matrix when
+    NumPy is available, so a lookup is a single matrix-vector product
+    instead of one Python-level dot product per entry; without NumPy the
+    cache falls back to plain lists.
+    """
+
+    def __init__(
+        self,
+        embedder: Embedder,
+        *,
+        threshold: float = 0.92,
+        ttl: float = 3600.0,
+        max_entries: int = 1024,
+    ) -> None:
+        self._embedder = embedder
+        self._threshold = threshold
+        self._ttl = ttl
+        self._max_entries = max(max_entries, 1)
+        # Parallel structures: one entry per cached response.
+        self._namespaces: List[str] = []
+        self._responses: List[str] = []
+        self._expirations: List[float] = []
+        self._embeddings: List[List[float]] = []  # fallback storage
+        self._matrix = None  # preallocated (capacity, dim) float32, NumPy only
+        self._count = 0
+
+    def __len__(self) -> int:
+        return len(self._responses)
+
+    def _embed(self, text: str):
+        embedding = self._embedder(text)
+        if np is not None:
+            row = np.asarray(embedding, dtype=np.float32)
+            norm = float(np.linalg.norm(row))
+            return row / norm if norm > 0.0 else row
+        return _normalize(embedding)
+
+    def _evict(self, index: int) -> None:
+        del self._namespaces[index]
+        del self._responses[index]
+        del self._expirations[index]
+        if np is not None:
+            if index < self._count - 1:
+                self._matrix[index : self._count - 1] = self._matrix[index + 1 : self._count]
+            self._count -= 1
+        else:
+            del self._embeddings[index]
+
+    def _purge_expired(self, now: float) -> None:
+        for index in range(len(self._expirations) - 1, -1, -1):
+            if self._expirations[index] <= now:
+                self._evict(index)
+
+    def _append_row(self, row) -> None:
+        if self._matrix is None:
+            self._matrix = np.empty((8, row.shape[0]), dtype=np.float32)
+        elif self._count == self._matrix.shape[0]:
+            grown = np.empty((self._matrix.shape[0] * 2, self._matrix.shape[1]), dtype=np.float32)
+            grown[: self._count] = self._matrix[: self._count]
+            self._matrix = grown
+        self._matrix[self._count] = row
+        self._count += 1
+
+    def lookup(self, namespace: str, text: str) -> str | None:
+        """Return the cached response most similar to ``text``, if any."""
+        if not self._responses:
+            return None
+
+        now = time.monotonic()
+        self._purge_expired(now)
+        if not self._responses:
+            return None
+
+        query = self._embed(text)
+
+        if np is not None:
+            scores = self._matrix[: self._count] @ query
+            eligible = np.fromiter(
+                (ns == namespace for ns in self._namespaces), dtype=bool, count=self._count
+            )
+            scores = np.where(eligible, scores, -np.inf)
+            best_index = int(scores.argmax())
+            best_score = float(scores[best_index])
+        else:
+            best_score = 0.0
+            best_index = -1
+            for index, embedding in enumerate(self._embeddings):
+                if self._namespaces[index] != namespace:
+                    continue
+                score = sum(a * b for a, b in zip(query, embedding))
+                if score > best_score:
+                    best_score = score
+                    best_index = index
+
+        if best_index >= 0 and best_score >= self._threshold:
+            return self._responses[best_index]
+        return None
+
+    def store(self, namespace: str, text: str, response: str) -> None:
+        """Cache ``response`` under the embedding of ``text``."""
+        # Embed before touching the parallel arrays: an embedder failure
+        # must not leave them out of sync with the stored rows.
+        embedding = self._embed(text)
+
+        now = time.monotonic()
+        self._purge_expired(now)
+        while len(self._responses) >= self._max_entries:
+            self._evict(0)
+
+        self._namespaces.append(namespace)
+        self._responses.append(response)
+        self._expirations.append(now + self._ttl)
+        if np is not None:
+            self._append_row(embedding)
+        else:
+            self._embeddings.append(embedding)
+
+
+__all__ = ["SemanticCache"]
@@ -36,8 +36,10 @@ def main() -> int:
             print("Cerrando sesión. ¡Hasta luego!")
             break
 
-        respuesta = chat.respond(args.usuario, mensaje)
-        print(f"Paibot: {respuesta}")
+        print("Paibot: ", end="", flush=True)
+        for pedazo in chat.respond_stream(args.usuario, mensaje):
+            print(pedazo, end="", flush=True)
+        print()
 
     return 0
 